@@ -1,5 +1,9 @@
 """Functions for reading and writing AGP files."""
-from typing import Iterator, TextIO, Union
+from sys import intern
+from typing import IO, Iterable, Iterator, List, TextIO, Union
+
+gap_component_types = frozenset(("N", "U"))
+"""values of the component_type column that denote a gap"""
 
 
 class AgpFormatError(Exception):
@@ -25,6 +29,23 @@ class AgpRow:
     <https://www.ncbi.nlm.nih.gov/assembly/agp/AGP_Specification/>
     """
 
+    __slots__ = (
+        "object",
+        "object_beg",
+        "object_end",
+        "part_number",
+        "component_type",
+        "is_gap",
+        "gap_length",
+        "gap_type",
+        "linkage",
+        "linkage_evidence",
+        "component_id",
+        "component_beg",
+        "component_end",
+        "orientation",
+    )
+
     def __init__(self, line: str):
         """Creates a new instance of AgpRow
 
@@ -44,19 +65,19 @@ class AgpRow:
             """object_end column of AGP"""
             self.part_number = int(splits[3])
             """part_number column of AGP"""
-            self.component_type = splits[4]
+            self.component_type = intern(splits[4])
             """component_type column of AGP"""
 
-            if self.component_type in ["N", "U"]:
+            if self.component_type in gap_component_types:
                 self.is_gap = True
                 """is_gap column of AGP"""
                 self.gap_length = int(splits[5])
                 """gap_length column of AGP"""
-                self.gap_type = splits[6]
+                self.gap_type = intern(splits[6])
                 """gap_type column of AGP"""
-                self.linkage = splits[7]
+                self.linkage = intern(splits[7])
                 """linkage column of AGP"""
-                self.linkage_evidence = splits[8]
+                self.linkage_evidence = intern(splits[8])
                 """linkage_evidence column of AGP"""
             else:
                 self.is_gap = False
@@ -66,7 +87,7 @@ class AgpRow:
                 """component_beg column of AGP"""
                 self.component_end = int(splits[7])
                 """component_end column of AGP"""
-                self.orientation = splits[8]
+                self.orientation = intern(splits[8])
                 """orientation column of AGP"""
         except (ValueError, IndexError) as e:
             raise AgpFormatError(line) from e
@@ -77,40 +98,21 @@ class AgpRow:
         text containing all the fields separated by tabs.
         """
         if self.is_gap:
-            return "\t".join(
-                map(
-                    str,
-                    [
-                        self.object,
-                        self.object_beg,
-                        self.object_end,
-                        self.part_number,
-                        self.component_type,
-                        self.gap_length,
-                        self.gap_type,
-                        self.linkage,
-                        self.linkage_evidence,
-                    ],
-                )
+            return (
+                f"{self.object}\t{self.object_beg}\t{self.object_end}\t"
+                f"{self.part_number}\t{self.component_type}\t{self.gap_length}\t"
+                f"{self.gap_type}\t{self.linkage}\t{self.linkage_evidence}"
             )
         else:
-            return "\t".join(
-                map(
-                    str,
-                    [
-                        self.object,
-                        self.object_beg,
-                        self.object_end,
-                        self.part_number,
-                        self.component_type,
-                        self.component_id,
-                        self.component_beg,
-                        self.component_end,
-                        self.orientation,
-                    ],
-                )
+            return (
+                f"{self.object}\t{self.object_beg}\t{self.object_end}\t"
+                f"{self.part_number}\t{self.component_type}\t{self.component_id}\t"
+                f"{self.component_beg}\t{self.component_end}\t{self.orientation}"
             )
 
+    def __repr__(self) -> str:
+        return f"AgpRow({str(self)!r})"
+
     def __eq__(self, other):
         if self.is_gap != other.is_gap:
             return False
@@ -140,6 +142,35 @@ class AgpRow:
                 and self.orientation == other.orientation
             )
 
+    def copy(self) -> "AgpRow":
+        """Copy a row
+
+        Make a new row with the same values in every column as this one,
+        which can then be modified without affecting this row. This is
+        much cheaper than `copy.deepcopy`.
+
+        Returns:
+            a copy of this row
+        """
+        new_row = object.__new__(type(self))
+        new_row.object = self.object
+        new_row.object_beg = self.object_beg
+        new_row.object_end = self.object_end
+        new_row.part_number = self.part_number
+        new_row.component_type = self.component_type
+        new_row.is_gap = self.is_gap
+        if self.is_gap:
+            new_row.gap_length = self.gap_length
+            new_row.gap_type = self.gap_type
+            new_row.linkage = self.linkage
+            new_row.linkage_evidence = self.linkage_evidence
+        else:
+            new_row.component_id = self.component_id
+            new_row.component_beg = self.component_beg
+            new_row.component_end = self.component_end
+            new_row.orientation = self.orientation
+        return new_row
+
     def contains(self, position: int) -> bool:
         """Check whether a row contains a position
 
@@ -156,6 +187,8 @@ class AgpRow:
 
 
 class GapRow(AgpRow):
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -209,6 +242,31 @@ def read(infile: TextIO) -> Iterator[Union[str, AgpRow]]:
             yield AgpRow(line)
 
 
+def write(rows: Iterable[Union[str, AgpRow]], outfile: IO[str], batch_size: int = 8192):
+    """Write an AGP file
+
+    Write AGP rows and comment lines to a file, one per line. Lines are
+    collected and written in batches, which is much faster for large
+    AGPs than printing each row separately. If rows raises an error
+    partway through, the rows before it are still written out.
+
+    Args:
+        rows: AgpRow instances and comment strings to write
+        outfile: file to write the AGP to
+        batch_size: number of lines to collect before each write
+    """
+    lines: List[str] = []
+    try:
+        for row in rows:
+            lines.append(str(row))
+            if len(lines) >= batch_size:
+                outfile.write("\n".join(lines) + "\n")
+                lines.clear()
+    finally:
+        if lines:
+            outfile.write("\n".join(lines) + "\n")
+
+
 def open_agp(filename: str) -> Iterator[Union[str, AgpRow]]:
     """Open and read an AGP file
 
@@ -6,12 +6,83 @@ from __future__ import annotations
 
 import argparse
 import sys
-
-import pyfaidx
-import screed
+from typing import Iterator, Optional, Union
 
 import agp
-from agp import assemble, bed, flip, join, remove, rename, sanitize, split, transform
+from agp import bed, flip, join, remove, rename, split, transform
+
+
+def agp_or_stdin(
+    agp_rows: Optional[Iterator[Union[str, agp.AgpRow]]],
+) -> Iterator[Union[str, agp.AgpRow]]:
+    """
+    Returns the given AGP rows, or rows read from STDIN if no AGP file
+    was specified on the command line.
+    """
+    return agp_rows if agp_rows is not None else agp.read(sys.stdin)
+
+
+def run_split(args: argparse.Namespace):
+    """run the 'split' command"""
+    split.run(args.breakpoints, args.outfile, agp_or_stdin(args.agp))
+
+
+def run_join(args: argparse.Namespace):
+    """run the 'join' command"""
+    join.run(
+        args.joins_list,
+        args.outfile,
+        agp_or_stdin(args.agp),
+        args.gap_size,
+        args.gap_type,
+        args.gap_evidence,
+    )
+
+
+def run_flip(args: argparse.Namespace):
+    """run the 'flip' command"""
+    flip.run(args.segments_to_flip, args.outfile, agp_or_stdin(args.agp))
+
+
+def run_remove(args: argparse.Namespace):
+    """run the 'remove' command"""
+    remove.run(args.scaffolds_to_remove, args.outfile, agp_or_stdin(args.agp))
+
+
+def run_rename(args: argparse.Namespace):
+    """run the 'rename' command"""
+    rename.run(args.renaming_file, args.outfile, agp_or_stdin(args.agp))
+
+
+def run_assemble(args: argparse.Namespace):
+    """run the 'assemble' command"""
+    # the assemble module pulls in screed and pyfaidx, which are slow to
+    # import and only needed here, so don't make every other command pay
+    # for them
+    from agp import assemble
+
+    with assemble.open_contigs(args.contigs_fasta) as contigs:
+        assemble.run(contigs, args.outfile, agp_or_stdin(args.agp))
+
+
+def run_transform(args: argparse.Namespace):
+    """run the 'transform' command"""
+    transform.run(args.bed, agp_or_stdin(args.agp), args.outfile)
+
+
+def run_sanitize(args: argparse.Namespace):
+    """run the 'sanitize' command"""
+    # pyfaidx is slow to import, so only import it when it's needed
+    import pyfaidx
+
+    from agp import sanitize
+
+    sanitize.run(
+        agp_or_stdin(args.agp_in),
+        args.agp_out,
+        pyfaidx.Fasta(args.contigs_fasta_in),
+        args.contigs_fasta_out,
+    )
 
 
 def parse_args():
@@ -49,9 +120,9 @@ def parse_args():
         nargs="?",
         type=agp.open_agp,
         help="AGP file to modify [STDIN]",
-        default=agp.read(sys.stdin),
+        default=None,
     )
-    split_parser.set_defaults(func=lambda a: split.run(a.breakpoints, a.outfile, a.agp))
+    split_parser.set_defaults(func=run_split)
 
     # --- 'join' command options ---
     join_parser = subparsers.add_parser(
@@ -97,18 +168,9 @@ def parse_args():
         nargs="?",
         type=agp.open_agp,
         help="AGP file to modify [STDIN]",
-        default=agp.read(sys.stdin),
-    )
-    join_parser.set_defaults(
-        func=lambda a: join.run(
-            a.joins_list,
-            a.outfile,
-            a.agp,
-            a.gap_size,
-            a.gap_type,
-            a.gap_evidence,
-        )
+        default=None,
     )
+    join_parser.set_defaults(func=run_join)
 
     # --- 'flip' command options ---
     flip_parser = subparsers.add_parser(
@@ -139,11 +201,9 @@ def parse_args():
         nargs="?",
         type=agp.open_agp,
         help="AGP file to modify [STDIN]",
-        default=agp.read(sys.stdin),
-    )
-    flip_parser.set_defaults(
-        func=lambda a: flip.run(a.segments_to_flip, a.outfile, a.agp)
+        default=None,
     )
+    flip_parser.set_defaults(func=run_flip)
 
     remove_parser = subparsers.add_parser(
         "remove", help="remove scaffolds from the assembly"
@@ -166,11 +226,9 @@ def parse_args():
         nargs="?",
         type=agp.open_agp,
         help="AGP file to modify [STDIN]",
-        default=agp.read(sys.stdin),
-    )
-    remove_parser.set_defaults(
-        func=lambda a: remove.run(a.scaffolds_to_remove, a.outfile, a.agp)
+        default=None,
     )
+    remove_parser.set_defaults(func=run_remove)
 
     rename_parser = subparsers.add_parser(
         "rename",
@@ -195,11 +253,9 @@ def parse_args():
         nargs="?",
         type=agp.open_agp,
         help="AGP file to modify [STDIN]",
-        default=agp.read(sys.stdin),
-    )
-    rename_parser.set_defaults(
-        func=lambda a: rename.run(a.renaming_file, a.outfile, a.agp)
+        default=None,
     )
+    rename_parser.set_defaults(func=run_rename)
 
     # --- 'assemble' command options ---
     assemble_parser = subparsers.add_parser(
@@ -214,17 +270,17 @@ def parse_args():
         default=sys.stdout,
     )
     assemble_parser.add_argument(
-        "contigs_fasta", type=screed.open, help="Assembly to flip scaffolds in"
+        "contigs_fasta",
+        help="fasta of contigs to assemble. If it can be indexed, a .fai "
+        "index is written next to it unless one already exists",
     )
     assemble_parser.add_argument(
         "agp",
         type=agp.open_agp,
-        default=agp.read(sys.stdin),
+        default=None,
         help="AGP file assembling contigs into scaffolds [STDIN]",
     )
-    assemble_parser.set_defaults(
-        func=lambda a: assemble.run(a.contigs_fasta, a.outfile, a.agp)
-    )
+    assemble_parser.set_defaults(func=run_assemble)
 
     # --- 'transform' command options ---
     transform_parser = subparsers.add_parser(
@@ -250,9 +306,9 @@ def parse_args():
         nargs="?",
         type=agp.open_agp,
         help="AGP file to modify [STDIN]",
-        default=agp.read(sys.stdin),
+        default=None,
     )
-    transform_parser.set_defaults(func=lambda a: transform.run(a.bed, a.agp, a.outfile))
+    transform_parser.set_defaults(func=run_transform)
 
     # --- 'transform' command options ---
     sanitize_parser = subparsers.add_parser(
@@ -265,7 +321,6 @@ def parse_args():
     )
     sanitize_parser.add_argument(
         "contigs_fasta_in",
-        type=pyfaidx.Fasta,
         help="input contigs corresponding to input AGP",
     )
     sanitize_parser.add_argument(
@@ -278,7 +333,7 @@ def parse_args():
         nargs="?",
         type=agp.open_agp,
         help="AGP file to modify [STDIN]",
-        default=agp.read(sys.stdin),
+        default=None,
     )
     sanitize_parser.add_argument(
         "-o",
@@ -288,11 +343,7 @@ def parse_args():
         help="where to write output AGP [STDOUT]",
         default=sys.stdout,
     )
-    sanitize_parser.set_defaults(
-        func=lambda a: sanitize.run(
-            a.agp_in, a.agp_out, a.contigs_fasta_in, a.contigs_fasta_out
-        )
-    )
+    sanitize_parser.set_defaults(func=run_sanitize)
 
     return parser.parse_args()
 
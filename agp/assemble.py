@@ -2,13 +2,14 @@
 Functions for assembling scaffolds from contigs based on an agp file
 """
 
-from itertools import filterfalse
-from typing import IO, Iterable
+from contextlib import contextmanager
+from typing import IO, Dict, Iterable, Iterator, Optional, Union
 
+import pyfaidx
 import screed
 
 import agp
-from agp.fasta import print_fasta
+from agp.fasta import FastaWriter, complement_table
 
 
 class NoSuchContigError(Exception):
@@ -24,28 +25,61 @@ class EmptyAgpError(Exception):
 
 
 def complement(base: str) -> str:
-    complement_dict = {
-        "A": "T",
-        "a": "t",
-        "C": "G",
-        "c": "g",
-        "G": "C",
-        "g": "c",
-        "T": "A",
-        "t": "a",
-    }
-    if base in complement_dict:
-        return complement_dict[base]
-    else:
-        return base
+    return base.translate(complement_table)
+
+
+def reverse_complement(sequence: str) -> str:
+    return sequence.translate(complement_table)[::-1]
+
+
+@contextmanager
+def open_contigs(filename: str) -> Iterator[Union[pyfaidx.Fasta, Dict[str, str]]]:
+    """
+    Open a contigs fasta for looking up component sequences by name.
+
+    If the fasta can be indexed, it is opened with pyfaidx so that only
+    the parts of it that are needed get read from disk. This writes a
+    .fai index next to the fasta, unless it already has one. Fastas
+    that pyfaidx can't open, like those with variable line lengths,
+    those compressed with plain gzip rather than bgzip, or those in a
+    directory where the index can't be written, are loaded into memory
+    with screed instead. Either way, contigs are named by the first word
+    of their header line, and if several contigs have the same name,
+    the last one is used.
 
+    Args:
+        filename: path to the contigs fasta
 
-def reverse_complement(sequence: str):
-    return "".join(complement(s) for s in sequence[::-1])
+    Yields:
+        a mapping from contig name to sequence, where each sequence
+        can be sliced to get a string. The fasta is closed again when
+        the context exits.
+    """
+    fasta: Optional[pyfaidx.Fasta]
+    # pyfaidx raises OSError (which UnsupportedCompressionFormat is a
+    # subclass of) if it can't write the index, and ImportError for any
+    # gzipped fasta if biopython, which it needs to read bgzip, isn't
+    # installed
+    try:
+        fasta = pyfaidx.Fasta(filename, as_raw=True, duplicate_action="last")
+    except (pyfaidx.FastaIndexingError, OSError, ImportError):
+        fasta = None
+
+    if fasta is None:
+        with screed.open(filename) as contigs_fasta:
+            contigs = {
+                record.name.split()[0]: record.sequence for record in contigs_fasta
+            }
+        yield contigs
+    else:
+        with fasta:
+            yield fasta
 
 
 def run(
-    contigs_fasta: screed.openscreed.Open, outfile: IO, agp_rows: Iterable[agp.AgpRow]
+    contigs: Union[pyfaidx.Fasta, Dict[str, str]],
+    outfile: IO,
+    agp_rows: Iterable[Union[str, agp.AgpRow]],
 ):
     """
     Given contigs in fasta format and their order and orientation into
@@ -53,43 +87,40 @@ def run(
     format.
 
     Args:
-        contigs_fasta: fasta iterator in screed format containing contigs
+        contigs: mapping from contig name to sequence, as returned by
+            open_contigs()
         outfile: file where scaffolds fasta should be written
         agp_rows: iterable returning agp.AgpRow objects, each
-            containing a single row of the agp file
+            containing a single row of the agp file, and comment lines
+            as strings, which are skipped
     """
-    # unfortunately, the contigs fasta file I'm writing this for has
-    # variable line-length and is thus not faidx-able, so we have to
-    # load it into memory :(
-    contigs = {record.name: record.sequence for record in contigs_fasta}
-
-    current_sequence = None
+    # write each scaffold out piece by piece as we go, instead of
+    # building up its whole sequence in memory first
+    writer = FastaWriter(outfile)
     current_chrom = None
-    # loop through AGP, skipping comment lines, which my agp library
-    # yields as strings
-    for row in filterfalse(agp.is_string, agp_rows):
+    for row in agp_rows:
+        # skip comment lines, which my agp library yields as strings
+        if isinstance(row, str):
+            continue
+
         # check if starting a new chromosome
         if row.object != current_chrom:
-            # if this is not the first chromosome, output the previous
-            # chromosome
-            if current_chrom is not None:
-                print_fasta(current_chrom, current_sequence, outfile=outfile)
-            # start the new chromosome as an empty sequence
             current_chrom = row.object
-            current_sequence = ""
+            writer.start_record(current_chrom)
 
-        if row.is_gap and current_sequence is not None:
-            current_sequence += "N" * row.gap_length
+        if row.is_gap:
+            writer.write_gap(row.gap_length)
         else:
             start, end = row.component_beg - 1, row.component_end
-            if row.component_id not in contigs.keys():
-                raise NoSuchContigError(row.component_id)
-            component = contigs[row.component_id][start:end]
+            try:
+                contig = contigs[row.component_id]
+            except KeyError:
+                raise NoSuchContigError(row.component_id) from None
             if row.orientation == "-":
-                component = reverse_complement(component)
-            current_sequence += component
+                writer.write_reverse_complement(contig, start, end)
+            else:
+                writer.write(contig[start:end])
 
-    if current_sequence is not None and current_chrom is not None:
-        print_fasta(current_chrom, current_sequence, outfile=outfile)
-    else:
+    if current_chrom is None:
         raise EmptyAgpError("The input agp has no components!")
+    writer.finish_record()
@@ -1,9 +1,9 @@
 """
 Functions for parsing bed files
 """
-import re
+
 from dataclasses import dataclass
-from typing import Iterator, List, Optional, TextIO, Union
+from typing import Iterable, Iterator, List, Optional, TextIO, Union
 
 
 class EmptyRangeError(Exception):
@@ -67,9 +67,6 @@ class BedRange:
         return "\t".join(map(str, fields))
 
 
-empty_line_regex = re.compile(r"^\s*$")
-
-
 def open_bed(filename: str) -> Iterator[BedRange]:
     """Open and parse a bed file
 
@@ -94,14 +91,17 @@ def read(bedfile: TextIO) -> Iterator[BedRange]:
         an iterator that yields single lines of the file at a time
     """
     for i, line in enumerate(bedfile):
-        if not empty_line_regex.match(line):
-            splits = line.strip().split("\t")
+        # strip once, and skip the line if nothing is left
+        line = line.strip()
+        if line:
+            splits = line.split("\t")
+            num_fields = len(splits)
             try:
-                if len(splits) == 1:
+                if num_fields == 1:
                     yield BedRange(splits[0])
-                elif len(splits) == 2:
+                elif num_fields == 2:
                     raise ParsingError(f"Line {i+1} of bed misformatted.")
-                elif len(splits) == 3:
+                elif num_fields == 3:
                     yield BedRange(
                         splits[0],
                         start=int(splits[1]),
@@ -117,3 +117,27 @@ def read(bedfile: TextIO) -> Iterator[BedRange]:
                     )
             except (ValueError, IndexError):
                 raise ParsingError(f"Line {i+1} of bed misformatted.")
+
+
+def write(bed_ranges: Iterable[BedRange], outfile: TextIO, batch_size: int = 8192):
+    """Write a bed file
+
+    Write bed ranges to a file, one per line, collecting them into
+    batches the same way agp.write does. If bed_ranges raises an error
+    partway through, the ranges before it are still written out.
+
+    Args:
+        bed_ranges: ranges to write
+        outfile: file to write the bed ranges to
+        batch_size: number of lines to collect before each write
+    """
+    lines: List[str] = []
+    try:
+        for bed_range in bed_ranges:
+            lines.append(str(bed_range))
+            if len(lines) >= batch_size:
+                outfile.write("\n".join(lines) + "\n")
+                lines.clear()
+    finally:
+        if lines:
+            outfile.write("\n".join(lines) + "\n")
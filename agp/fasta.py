@@ -1,7 +1,12 @@
 """
 Functions for working with fasta format.
 """
-from typing import IO
+from typing import IO, Union
+
+import pyfaidx
+
+complement_table = str.maketrans("ACGTacgt", "TGCAtgca")
+"""str.translate() table mapping each base to its complement"""
 
 
 def print_fasta(name: str, sequence: str, outfile: IO, wrap: int = 60):
@@ -25,6 +30,167 @@ def print_fasta(name: str, sequence: str, outfile: IO, wrap: int = 60):
         CGACTGACTG
         ACTACTG
     """
-    print(f">{name}", file=outfile)
-    for start_pos in range(0, len(sequence), wrap):
-        print(sequence[start_pos : start_pos + wrap], file=outfile)
+    # build the whole record and write it at once, rather than making a
+    # separate call to print() for every line
+    lines = [f">{name}"]
+    lines += (
+        sequence[start_pos : start_pos + wrap]
+        for start_pos in range(0, len(sequence), wrap)
+    )
+    outfile.write("\n".join(lines) + "\n")
+
+
+class FastaWriter:
+    """
+    Writes fasta records whose sequences arrive in pieces, wrapping
+    lines as it goes, so that the whole sequence of a record never
+    needs to be held in memory at once.
+
+    Examples:
+        >>> from io import StringIO
+        >>> outfile = StringIO()
+        >>> writer = FastaWriter(outfile, wrap=10)
+        >>> writer.start_record('chr1')
+        >>> writer.write('ATCGACTGATCGA')
+        >>> writer.write('CTGACTGACTACTG')
+        >>> writer.start_record('chr2')
+        >>> writer.write('ACTG')
+        >>> writer.finish_record()
+        >>> print(outfile.getvalue(), end='')
+        >chr1
+        ATCGACTGAT
+        CGACTGACTG
+        ACTACTG
+        >chr2
+        ACTG
+    """
+
+    def __init__(self, outfile: IO, wrap: int = 60):
+        """
+        Args:
+            outfile: where to write the records to
+            wrap: the number of bases per line of sequence
+        """
+        self.outfile = outfile
+        self.wrap = wrap
+        # bases of the current record that don't fill a whole line yet
+        self.partial_line = ""
+        # a whole line of Ns, for writing out long gaps
+        self.gap_line = "N" * wrap + "\n"
+
+    def start_record(self, name: str):
+        """
+        Finish the current record, if there is one, and start a new
+        one.
+
+        Args:
+            name: the sequence id of the new record
+        """
+        self.finish_record()
+        self.outfile.write(f">{name}\n")
+
+    def write(self, sequence: str):
+        """
+        Append a piece of sequence to the current record.
+
+        Args:
+            sequence: the bases to append
+        """
+        sequence = self.partial_line + sequence
+        full_lines_end = len(sequence) - len(sequence) % self.wrap
+        if full_lines_end:
+            self.outfile.write(
+                "\n".join(
+                    sequence[start_pos : start_pos + self.wrap]
+                    for start_pos in range(0, full_lines_end, self.wrap)
+                )
+                + "\n"
+            )
+        self.partial_line = sequence[full_lines_end:]
+
+    def write_reverse_complement(
+        self,
+        sequence: Union[str, pyfaidx.FastaRecord],
+        start: int,
+        end: int,
+        window: int = 65536,
+    ):
+        """
+        Append the reverse complement of sequence[start:end] to the
+        current record. The range is read a window at a time from its
+        end backwards, so the reverse complement of the whole range
+        never needs to be held in memory at once.
+
+        Args:
+            sequence: sequence containing the range, either as a string
+                or as a pyfaidx record opened with as_raw=True, so that
+                slicing it gives a string
+            start: 0-based start of the range
+            end: end of the range, exclusive
+            window: the number of bases to reverse complement at a time
+
+        Examples:
+            >>> from io import StringIO
+            >>> outfile = StringIO()
+            >>> writer = FastaWriter(outfile, wrap=4)
+            >>> writer.start_record('chr1')
+            >>> writer.write_reverse_complement('TTAACCGGTT', 1, 9, window=3)
+            >>> writer.finish_record()
+            >>> print(outfile.getvalue(), end='')
+            >chr1
+            ACCG
+            GTTA
+        """
+        for window_end in range(end, start, -window):
+            self.write(
+                sequence[max(start, window_end - window) : window_end].translate(
+                    complement_table
+                )[::-1]
+            )
+
+    def write_gap(self, length: int, window: int = 65536):
+        """
+        Append a run of Ns to the current record. Whole lines of Ns are
+        written out a window at a time, without building the full run as
+        one string and then splitting it back up into lines.
+
+        Args:
+            length: the number of Ns to append
+            window: the number of Ns to write out at a time
+
+        Examples:
+            >>> from io import StringIO
+            >>> outfile = StringIO()
+            >>> writer = FastaWriter(outfile, wrap=4)
+            >>> writer.start_record('chr1')
+            >>> writer.write('ACG')
+            >>> writer.write_gap(14, window=8)
+            >>> writer.write_gap(1)
+            >>> writer.write('T')
+            >>> writer.finish_record()
+            >>> print(outfile.getvalue(), end='')
+            >chr1
+            ACGN
+            NNNN
+            NNNN
+            NNNN
+            NNT
+        """
+        # top up the current partial line first
+        fill = min(length, self.wrap - len(self.partial_line))
+        self.write("N" * fill)
+        full_lines, remainder = divmod(length - fill, self.wrap)
+        # never build more than a window's worth of lines at once, so a
+        # huge gap doesn't need as much memory as its length
+        window_lines = max(1, window // self.wrap)
+        for lines_written in range(0, full_lines, window_lines):
+            self.outfile.write(
+                self.gap_line * min(window_lines, full_lines - lines_written)
+            )
+        self.partial_line += "N" * remainder
+
+    def finish_record(self):
+        """Write out the last, partial line of the current record."""
+        if self.partial_line:
+            self.outfile.write(self.partial_line + "\n")
+            self.partial_line = ""
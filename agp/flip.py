@@ -5,54 +5,51 @@ flip, output a new AGP file with those chromosomes reoriented in
 reverse-complement.
 """
 
-from typing import IO, Iterable, List, Sequence, Tuple
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import IO, Dict, Iterable, List, Sequence, Union
 
+import agp
 from agp import AgpRow, bed
 from agp.bed import BedRange
 
+orientation_flips = {"+": "-", "-": "+"}
+
 
 def reverse_rows(rows: List[AgpRow]) -> List[AgpRow]:
     """
-    Given a list of AGP rows, return a new set of rows assembling
-    the reverse complement of the input rows.
+    Given a list of AGP rows, modify them in place so that they
+    assemble the reverse complement of the input rows.
 
     Args:
         rows: an ordered list of AgpRow objects to reverse
 
     Returns:
-        the input, except in reverse order, with the rows modified to be
-        reverse-complements
+        the input list, now in reverse order, with the rows modified to
+        be reverse-complements
     """
-    # first, get the first and last part numbers and the start and end
-    # position of the entire segment being flipped so we can count
-    # backwards from there.
-    first_part_number = rows[0].part_number
-    last_part_number = rows[-1].part_number
-    first_part_start = rows[0].object_beg
-    last_part_end = rows[-1].object_end
-
-    reversed_rows = []
-    for row in reversed(rows):
-        new_start = first_part_start + last_part_end - row.object_end
-        new_end = first_part_start + last_part_end - row.object_beg
-        row.object_beg, row.object_end = new_start, new_end
-
-        row.part_number = first_part_number + last_part_number - row.part_number
-
+    # the new coordinates of each row are the old ones counted backwards
+    # from the end of the segment being flipped, so precompute the sums
+    # of the first and last part numbers and the start and end positions
+    part_number_sum = rows[0].part_number + rows[-1].part_number
+    position_sum = rows[0].object_beg + rows[-1].object_end
+
+    rows.reverse()
+    for row in rows:
+        row.object_beg, row.object_end = (
+            position_sum - row.object_end,
+            position_sum - row.object_beg,
+        )
+        row.part_number = part_number_sum - row.part_number
         if not row.is_gap:
-            if row.orientation == "+":
-                row.orientation = "-"
-            else:
-                row.orientation = "+"
+            row.orientation = orientation_flips.get(row.orientation, "+")
 
-        reversed_rows.append(row)
-
-    return reversed_rows
+    return rows
 
 
 def flip(
-    agp_rows: Sequence[AgpRow], ranges_to_flip: Iterable[BedRange]
-) -> List[AgpRow]:
+    agp_rows: Iterable[Union[str, AgpRow]], ranges_to_flip: Iterable[BedRange]
+) -> List[Union[str, AgpRow]]:
     """
     Reverse-complements all rows of an AGP file that fall within a list
     of ranges.
@@ -71,42 +68,67 @@ def flip(
     # whole agp in memory
     agp_rows = list(agp_rows)
 
+    # gather the rows of each object once, so that each range only has
+    # to look at the rows of its own object rather than the whole agp.
+    # The start positions, which are in order within each object, get
+    # updated after each flip.
+    object_rows: Dict[str, List[AgpRow]] = defaultdict(list)
+    object_row_begs: Dict[str, List[int]] = defaultdict(list)
+    for row in agp_rows:
+        if not isinstance(row, str):
+            object_rows[row.object].append(row)
+            object_row_begs[row.object].append(row.object_beg)
+
     for bed_range in ranges_to_flip:
-        # list of tuples (i, agp_row) of rows in bed_range
-        rows_to_reverse: List[Tuple[int, AgpRow]] = []
-        for i, row in enumerate(agp_rows):
-            if not isinstance(row, str) and row.object == bed_range.chrom:
-                # if no range in seq specified, flip the whole sequence
-                if bed_range.start is None or bed_range.end is None:
-                    rows_to_reverse.append((i, row))
-                # otherwise, flip only the part within range
-                elif (
-                    row.object_beg >= bed_range.start
-                    and row.object_end <= bed_range.end
-                ):
-                    rows_to_reverse.append((i, row))
-                # check for bad ranges (i.e., ones that only partially
-                # contain a component)
-                elif (bed_range.start and bed_range.end) and (
-                    row.contains(bed_range.start) or row.contains(bed_range.end)
-                ):
-                    raise bed.BadRangeError(bed_range)
-
-        # unzip and flip those rows we've collected
-        if len(rows_to_reverse) == 0:
+        rows = object_rows.get(bed_range.chrom, [])
+        begs = object_row_begs.get(bed_range.chrom, [])
+        # if no range in seq specified, flip the whole sequence
+        if bed_range.start is None or bed_range.end is None:
+            first, last = 0, len(rows)
+        # otherwise, flip only the rows starting within the range
+        else:
+            first = bisect_left(begs, bed_range.start)
+            last = bisect_right(begs, bed_range.end)
+            # check for bad ranges (i.e., ones that only partially
+            # contain a component). The rows of an object are in order
+            # and don't overlap, so the only ones that can straddle an
+            # end of the range are the row just before it and the last
+            # row starting inside it.
+            if bed_range.start and bed_range.end:
+                for j in (first - 1, last - 1):
+                    if 0 <= j < len(rows):
+                        row = rows[j]
+                        if not (
+                            row.object_beg >= bed_range.start
+                            and row.object_end <= bed_range.end
+                        ) and (
+                            row.contains(bed_range.start) or row.contains(bed_range.end)
+                        ):
+                            raise bed.BadRangeError(bed_range)
+            # leave out a last row that runs past the end of the range
+            if last > first and rows[last - 1].object_end > bed_range.end:
+                last -= 1
+
+        if first == last:
             raise bed.EmptyRangeError(bed_range)
-        unzipped = list(zip(*rows_to_reverse))
-        indices: List[int] = list(unzipped[0])
-        rows: List[AgpRow] = list(unzipped[1])
-        reversed_rows = reverse_rows(rows)
-
-        # replace the original rows with the reversed rows
-        for i, row in zip(indices, reversed_rows):
-            agp_rows[i] = row
-
-    return agp_rows
-
 
-def run(segments_to_flip: Sequence[BedRange], outfile: IO, agp_rows: Sequence[AgpRow]):
-    for row in flip(agp_rows, segments_to_flip):
-        print(row, file=outfile)
+        # reverse_rows() modifies the rows themselves in place, and also
+        # reverses their order within the range
+        rows[first:last] = reverse_rows(rows[first:last])
+        begs[first:last] = [row.object_beg for row in rows[first:last]]
+
+    # put the rows of each object back into the slots that object's rows
+    # took up in the agp, in their new order
+    object_row_iters = {name: iter(rows) for name, rows in object_rows.items()}
+    return [
+        row if isinstance(row, str) else next(object_row_iters[row.object])
+        for row in agp_rows
+    ]
+
+
+def run(
+    segments_to_flip: Sequence[BedRange],
+    outfile: IO,
+    agp_rows: Iterable[Union[str, AgpRow]],
+):
+    agp.write(flip(agp_rows, segments_to_flip), outfile)
@@ -3,18 +3,15 @@ Functions for joining scaffolds
 """
 
 import re
-from collections import Counter
 from collections.abc import Sequence
 from dataclasses import dataclass
-from itertools import chain
-from typing import Dict, Iterable, Iterator, List, Match, Optional, TextIO, Union, cast
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 
+import agp
 from agp import AgpRow, GapRow
 from agp.flip import reverse_rows
 
-scaffold_regex = re.compile(r"([a-zA-Z0-9]+)_([a-zA-Z0-9.]+)")
 sequence_name_regex = re.compile(r"^[a-zA-Z0-9._]+$")
-empty_line_regex = re.compile(r"^\s*$")
 
 
 class ScaffoldNotFoundError(Exception):
@@ -39,6 +36,28 @@ class BadSequenceNameError(Exception):
         return f"Bad scaffold name: '{self.name}'. Only [a-zA-Z0-9._] allowed."
 
 
+def split_orientation(scaffold: str) -> Tuple[str, bool]:
+    """
+    Splits the orientation off of a scaffold name from a joins file.
+
+    Args:
+        scaffold: a scaffold name, optionally preceded by "+" or "-"
+
+    Returns:
+        the bare scaffold name, and whether the scaffold should be
+            reverse-complemented
+
+    Examples:
+        >>> split_orientation("-scaffold_2")
+        ('scaffold_2', True)
+        >>> split_orientation("scaffold_1")
+        ('scaffold_1', False)
+    """
+    if scaffold.startswith(("+", "-")):
+        return scaffold[1:], scaffold[0] == "-"
+    return scaffold, False
+
+
 @dataclass
 class JoinGroup(Sequence):
     """A group of scaffolds to be joined together
@@ -67,6 +86,15 @@ class JoinGroup(Sequence):
     scaffolds: List[str]
     name: Optional[str] = None
 
+    @property
+    def oriented_scaffolds(self) -> List[Tuple[str, bool]]:
+        """
+        The scaffolds split by `split_orientation()` into bare names and
+        whether to reverse-complement them. This is worked out from
+        `scaffolds` on each access, so it never goes stale if they change.
+        """
+        return list(map(split_orientation, self.scaffolds))
+
     def __getitem__(self, index) -> str:
         return self.scaffolds[index]
 
@@ -94,21 +122,33 @@ def joins_type(filename: str) -> List[JoinGroup]:
     """
     joins: List[JoinGroup] = []
     with open(filename) as joins_file:
-        for line in joins_file:
-            if not empty_line_regex.match(line):
-                columns = line.strip().split("\t")
-                join_group = JoinGroup(columns[0].split(","))
-                if len(columns) > 1:
-                    if not sequence_name_regex.match(columns[1]):
-                        raise BadSequenceNameError(columns[1])
-                    join_group.name = columns[1]
-                joins.append(join_group)
-
-    # look for scaffolds used more than once
-    scaffold_counts = Counter(s.lstrip("+-") for s in chain.from_iterable(joins))
-    reused_scaffolds = [scaf for scaf, count in scaffold_counts.items() if count > 1]
+        lines = joins_file.read().splitlines()
+    for line in lines:
+        line = line.strip()
+        if line:
+            columns = line.split("\t")
+            join_group = JoinGroup(columns[0].split(","))
+            if len(columns) > 1:
+                if not sequence_name_regex.match(columns[1]):
+                    raise BadSequenceNameError(columns[1])
+                join_group.name = columns[1]
+            joins.append(join_group)
+
+    # look for scaffolds used more than once, using the names the join
+    # groups have already split off from their orientations. The reused
+    # names go in a dict rather than a set to keep them in order.
+    seen_scaffolds = set()
+    reused_scaffolds: Dict[str, None] = {}
+    for join_group in joins:
+        for scaffold_name, _ in join_group.oriented_scaffolds:
+            if scaffold_name in seen_scaffolds:
+                reused_scaffolds[scaffold_name] = None
+            else:
+                seen_scaffolds.add(scaffold_name)
     if reused_scaffolds:
-        raise ScaffoldUsedTwiceError(f"Scaffolds used 2+ times: {reused_scaffolds}")
+        raise ScaffoldUsedTwiceError(
+            f"Scaffolds used 2+ times: {list(reused_scaffolds)}"
+        )
 
     return joins
 
@@ -122,32 +162,35 @@ def make_superscaffold_name(subscaffold_names: Iterable[str]) -> str:
     Otherwise, it's the names of all scaffolds concatenated with 'p'.
 
     Args:
-        subscaffold_names (list(str)): list of names of subscaffolds
+        subscaffold_names (iterable(str)): names of subscaffolds
             being combined into a superscaffold
 
     Returns:
         superscaffold_name (str): a name for the new scaffolds based
             on the subscaffold names
     """
-    # TODO this casting is necessary but ugly as sin. Find a nicer way
-    matches = list(map(scaffold_regex.search, subscaffold_names))
-    if all(matches):
-        if all(
-            cast(Match, m).group(1) == cast(Match, matches[0]).group(1) for m in matches
-        ):
-            prefix = cast(Match, matches[0]).group(1)
-            suffix = "p".join([cast(Match, m).group(2) for m in matches])
-            return "{}_{}".format(prefix, suffix)
-    return "p".join(subscaffold_names)
+    # the generator passed in by join_scaffolds() would be used up by
+    # the time we need it again for the fallback, so make it a list
+    subscaffold_names = list(subscaffold_names)
+    # split each name into the part before its last underscore and the
+    # part after it, giving up as soon as one doesn't fit the pattern
+    prefix = subscaffold_names[0].rpartition("_")[0]
+    suffixes = []
+    for name in subscaffold_names:
+        name_prefix, _, suffix = name.rpartition("_")
+        if not name_prefix or name_prefix != prefix or not suffix:
+            return "p".join(subscaffold_names)
+        suffixes.append(suffix)
+    return "{}_{}".format(prefix, "p".join(suffixes))
 
 
 def join_scaffolds(
-    superscaffold_rows: List[List[AgpRow]],
+    superscaffold_rows: Iterable[List[AgpRow]],
     gap_size: int = 500,
     gap_type: str = "scaffold",
     gap_evidence: str = "na",
     name: str = None,
-) -> List[AgpRow]:
+) -> Iterator[AgpRow]:
     """
     Transforms agp rows from multiple scaffolds into agp rows for a
     single superscaffold containing all the given scaffolds in the
@@ -155,8 +198,8 @@ def join_scaffolds(
     using this function.
 
     Args:
-        superscaffold_rows: a list of lists of agp rows. Each sub-list is a
-            list of all rows in a single scaffold. These scaffolds will be
+        superscaffold_rows: an iterable of lists of agp rows. Each list
+            contains all rows in a single scaffold. These scaffolds will be
             joined in the order given
         gap_size: length of the new gaps created by joining scaffolds
             together
@@ -164,15 +207,19 @@ def join_scaffolds(
         gap_evidence: evidence type for linkage across gap
         name: name of new superscaffold. If None, this function will come
             up with a name based on the names of subscaffolds contained by
-            this superscaffold
+            this superscaffold, which means reading all of superscaffold_rows
+            before yielding anything
 
     Returns:
-        a list of AgpRow instances containing the new scaffold specification
+        an iterator over AgpRow instances containing the new scaffold
+            specification
     """
     # make a nice name for the new superscaffold we are creating
-    subscaffold_names = (s[0].object for s in superscaffold_rows)
     if name is None:
-        superscaffold_name = make_superscaffold_name(subscaffold_names)
+        superscaffold_rows = list(superscaffold_rows)
+        superscaffold_name = make_superscaffold_name(
+            s[0].object for s in superscaffold_rows
+        )
     else:
         superscaffold_name = name
 
@@ -183,38 +230,63 @@ def join_scaffolds(
     # so that we can add it as an offset to components of the current
     # subscaffold
     end_of_previous_scaffold = 0
-    # list(AgpRow) containing the rows to be returned
-    outrows = []
     # loop over the subscaffolds
     for i, this_scaffold_rows in enumerate(superscaffold_rows):
+        # add a gap between this subscaffold and the previous one
+        if i > 0:
+            yield GapRow(
+                superscaffold_name,
+                end_of_previous_scaffold + 1,
+                end_of_previous_scaffold + gap_size,
+                component_number_counter,
+                length=gap_size,
+                gap_type=gap_type,
+                evidence=gap_evidence,
+            )
+            component_number_counter += 1
+            end_of_previous_scaffold += gap_size
+
         # loop over the agp rows in this subscaffold
         for row in this_scaffold_rows:
-            # update the current row and put it in the output list
+            # update the current row and yield it
             row.object = superscaffold_name
             row.part_number = component_number_counter
             component_number_counter += 1
             row.object_beg += end_of_previous_scaffold
             row.object_end += end_of_previous_scaffold
-            outrows.append(row)
-        end_of_previous_scaffold = outrows[-1].object_end
-
-        # add a gap if we're not on the last subscaffold
-        if i < len(superscaffold_rows) - 1:
-            outrows.append(
-                GapRow(
-                    superscaffold_name,
-                    end_of_previous_scaffold + 1,
-                    end_of_previous_scaffold + gap_size,
-                    component_number_counter,
-                    length=gap_size,
-                    gap_type=gap_type,
-                    evidence=gap_evidence,
-                )
-            )
-            component_number_counter += 1
-            end_of_previous_scaffold = outrows[-1].object_end
+            yield row
+        end_of_previous_scaffold = row.object_end
+
+
+def collect_scaffolds(
+    agp_rows: Iterable[Union[str, AgpRow]],
+    scaffolds_to_join: Dict[str, List[AgpRow]],
+) -> Iterator[Union[str, AgpRow]]:
+    """
+    Sorts the rows of an agp into the ones to be joined and the ones to
+    be output as-is.
 
-    return outrows
+    Args:
+        agp_rows: all rows of the input agp
+        scaffolds_to_join: a dict mapping the name of each scaffold to be
+            joined to a list, to which that scaffold's rows are appended
+
+    Returns:
+        an iterator over all the rows that are not part of a scaffold
+            to be joined, including comments
+    """
+    for row in agp_rows:
+        if isinstance(row, str):
+            yield row
+            continue
+
+        # look each object up only once, rather than once to check for
+        # it and again to append to its list
+        scaffold_rows = scaffolds_to_join.get(row.object)
+        if scaffold_rows is None:
+            yield row
+        else:
+            scaffold_rows.append(row)
 
 
 def run(
@@ -231,18 +303,16 @@ def run(
     # first, make a dict mapping the names of all scaffolds that will
     # be modified to an empty list which will later contain all agp rows
     # of that scaffold.
-    scaffolds_to_join: Dict[str, List[AgpRow]] = {}
-    for name in (s.lstrip("+-") for s in chain.from_iterable(joins_list)):
-        scaffolds_to_join[name] = []
+    scaffolds_to_join: Dict[str, List[AgpRow]] = {
+        name: []
+        for join_group in joins_list
+        for name, _ in join_group.oriented_scaffolds
+    }
 
-    # print all the rows to be output as-is and put the rows that need
+    # write all the rows to be output as-is and put the rows that need
     # to be modified first into the correct slot of the
     # scaffolds_to_join dict
-    for row in agp_infile:
-        if isinstance(row, AgpRow) and row.object in scaffolds_to_join:
-            scaffolds_to_join[row.object].append(row)
-        else:
-            print(row, file=outfile)
+    agp.write(collect_scaffolds(agp_infile, scaffolds_to_join), outfile)
 
     # make sure we found agp entries for all the scaffolds
     for scaffold_name, rows in scaffolds_to_join.items():
@@ -250,20 +320,27 @@ def run(
             raise ScaffoldNotFoundError(f"Scaffold {scaffold_name} not found in agp.")
 
     # loop through each join group
-    for i, join_group in enumerate(joins_list):
-        scaffold_rows = []
-        # loop through the scaffolds in this join group
-        for scaffold_name in join_group:
-            if scaffold_name.startswith("-"):
-                # reverse-complement if necessary
-                scaffold_rows.append(
-                    reverse_rows(scaffolds_to_join[scaffold_name.lstrip("-")])
-                )
-            else:
-                scaffold_rows.append(scaffolds_to_join[scaffold_name.lstrip("+")])
+    for join_group in joins_list:
+        oriented_scaffolds = join_group.oriented_scaffolds
+
+        # name the superscaffold here, from the join group, so that
+        # join_scaffolds doesn't need to see every subscaffold up front
+        name = join_group.name
+        if name is None:
+            name = make_superscaffold_name(
+                scaffold_name for scaffold_name, _ in oriented_scaffolds
+            )
+
+        # the rows of each scaffold in this join group, reverse-complemented
+        # if necessary
+        scaffold_rows = (
+            (
+                reverse_rows(scaffolds_to_join[scaffold_name])
+                if reverse
+                else scaffolds_to_join[scaffold_name]
+            )
+            for scaffold_name, reverse in oriented_scaffolds
+        )
 
-        # print out all the rows for this join group
-        for row in join_scaffolds(
-            scaffold_rows, gap_size, gap_type, name=join_group.name
-        ):
-            print(row, file=outfile)
+        # write out all the rows for this join group
+        agp.write(join_scaffolds(scaffold_rows, gap_size, gap_type, name=name), outfile)
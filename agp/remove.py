@@ -1,10 +1,8 @@
-import re
-from typing import IO, Sequence, Set
+from typing import IO, Iterable, Iterator, Set, Union
 
+import agp
 from agp import AgpRow
 
-empty_line_regex = re.compile(r"^\s*$")
-
 
 class ScaffoldNotFoundError(Exception):
     pass
@@ -24,19 +22,42 @@ def scaffolds_list_type(filename: str) -> Set[str]:
     """
     scaffolds: Set[str] = set()
     with open(filename) as scaffolds_list_file:
-        for line in scaffolds_list_file:
-            if not empty_line_regex.match(line):
-                scaffolds.add(line.strip())
+        lines = scaffolds_list_file.read().splitlines()
+    for line in lines:
+        line = line.strip()
+        if line:
+            scaffolds.add(line)
     return scaffolds
 
 
-def run(scaffolds_to_remove: Set[str], outfile: IO, agp_in: Sequence[AgpRow]):
-    scaffolds_removed = set()
-    for row in agp_in:
+def remove_scaffolds(
+    agp_rows: Iterable[Union[str, AgpRow]],
+    scaffolds_to_remove: Set[str],
+    scaffolds_removed: Set[str],
+) -> Iterator[Union[str, AgpRow]]:
+    """Filter scaffolds out of an AGP
+
+    Args:
+        agp_rows: all rows of the input AGP
+        scaffolds_to_remove: names of the scaffolds to leave out
+        scaffolds_removed: set to which the name of each scaffold is
+            added as its rows are left out
+
+    Returns:
+        an iterator over the rows that are kept, including comments
+    """
+    for row in agp_rows:
         if isinstance(row, str) or row.object not in scaffolds_to_remove:
-            print(row, file=outfile)
+            yield row
         else:
             scaffolds_removed.add(row.object)
+
+
+def run(
+    scaffolds_to_remove: Set[str], outfile: IO, agp_in: Iterable[Union[str, AgpRow]]
+):
+    scaffolds_removed: Set[str] = set()
+    agp.write(remove_scaffolds(agp_in, scaffolds_to_remove, scaffolds_removed), outfile)
     remaining_scaffolds = scaffolds_to_remove - scaffolds_removed
     if remaining_scaffolds:
         raise ScaffoldNotFoundError(str(remaining_scaffolds))
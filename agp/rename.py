@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-import re
-from typing import Iterable, Mapping, Sequence, TextIO
+from typing import Iterable, Iterator, Mapping, TextIO
 
+import agp
 from agp import AgpRow
 from agp.flip import reverse_rows
 
@@ -15,9 +15,6 @@ class ScaffoldNotFoundError(Exception):
     pass
 
 
-empty_line_regex = re.compile(r"^\s*$")
-
-
 def renaming_file_type(filename: str) -> dict[str, tuple[str, str]]:
     """Parse a renaming file
 
@@ -36,31 +33,33 @@ def renaming_file_type(filename: str) -> dict[str, tuple[str, str]]:
     """
     renaming_dict = {}
     with open(filename, "r") as renaming_file:
-        for i, line in enumerate(renaming_file):
-            if not empty_line_regex.match(line):
-                fields = line.strip().split("\t")
-                if len(fields) < 2:
+        lines = renaming_file.read().splitlines()
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if line:
+            fields = line.split("\t")
+            if len(fields) < 2:
+                raise FormatError(
+                    f"Line {i+1} of renaming file doesn't have enough columns."
+                )
+            if len(fields) == 2:  # default to + orientation
+                renaming_dict[fields[0]] = (fields[1], "+")
+            else:
+                if fields[2] not in ["+", "-"]:
                     raise FormatError(
-                        f"Line {i+1} of renaming file doesn't have enough columns."
+                        f"Line {i+1}: orientation column can only contain + or -"
                     )
-                if len(fields) == 2:  # default to + orientation
-                    renaming_dict[fields[0]] = (fields[1], "+")
-                else:
-                    if fields[2] not in ["+", "-"]:
-                        raise FormatError(
-                            f"Line {i+1}: orientation column can only contain + or -"
-                        )
-                    renaming_dict[fields[0]] = (fields[1], fields[2])
+                renaming_dict[fields[0]] = (fields[1], fields[2])
 
     return renaming_dict
 
 
 def rename_rows(
-    rows_to_rename: Iterable[AgpRow], new_name: str, orientation: str
+    rows_to_rename: list[AgpRow], new_name: str, orientation: str
 ) -> list[AgpRow]:
     """Rename a bunch of agp rows
 
-    Rename a bunch of agp rows, and possibly reverse them too.
+    Rename a bunch of agp rows in place, and possibly reverse them too.
 
     Args:
         rows_to_rename:
@@ -72,70 +71,92 @@ def rename_rows(
             scaffold is desired
 
     Returns:
-        the renamed and perhaps reverse oriented rows
+        the input list, with the rows renamed and perhaps reverse
+        oriented
     """
-    new_rows = []
     for row in rows_to_rename:
         row.object = new_name
-        new_rows.append(row)
     if orientation == "-":
-        return reverse_rows(new_rows)
-    return new_rows
+        return reverse_rows(rows_to_rename)
+    return rows_to_rename
 
 
-def run(
+def rename_scaffolds(
     renaming_map: Mapping[str, tuple[str, str]],
-    outfile: TextIO,
-    agp_rows: Sequence[AgpRow],
-):
-    """Run the rename module
+    agp_rows: Iterable[str | AgpRow],
+    renamed_objects: set[str],
+) -> Iterator[str | AgpRow]:
+    """Rename the scaffolds of an AGP
 
     Args:
         renaming_map:
             maps the name of a contig to be renamed to a tuple
             containing the new name and orientation
-        outfile: file where agp output should be sent
         agp_rows: all input AGP rows
+        renamed_objects:
+            set to which the old name of each scaffold is added once it
+            has been renamed
+
+    Returns:
+        an iterator over the rows of the output AGP
     """
     rows_to_rename: list[AgpRow] = []
-    current_object = "none"  # can't use None because dict needs a string
-    renamed_objects: set[str] = set()
+    # the scaffold currently being collected for renaming ("" when
+    # there is none, since AGP object names can't be empty), and its new
+    # name and orientation, looked up once when we reach it
+    current_object = ""
+    current_renaming = ("", "+")
     for row in agp_rows:
         if isinstance(row, str):
-            print(row, file=outfile)
+            yield row
+        elif row.object == current_object:
+            # still on the scaffold we're collecting
+            rows_to_rename.append(row)
         elif row.object in renaming_map:
-            if rows_to_rename and current_object != row.object:
+            if rows_to_rename:
                 # we're on a new scaffold that does need to be renamed,
-                # but we haven't renamed and printed the last scaffold
+                # but we haven't renamed and output the last scaffold
                 # yet, so let's do that first
-                for row_to_print in rename_rows(
-                    rows_to_rename, *renaming_map[current_object]
-                ):
-                    print(row_to_print, file=outfile)
+                yield from rename_rows(rows_to_rename, *current_renaming)
                 rows_to_rename = []
                 renamed_objects.add(current_object)
             current_object = row.object
+            current_renaming = renaming_map[current_object]
             rows_to_rename.append(row)
         else:
-            if rows_to_rename and current_object != row.object:
+            if rows_to_rename:
                 # we're on a new scaffold that does not need to be
                 # renamed, but the previous scaffold does need to
-                # be renamed, so let's rename and print it out first
-                for row_to_print in rename_rows(
-                    rows_to_rename, *renaming_map[current_object]
-                ):
-                    print(row_to_print, file=outfile)
+                # be renamed, so let's rename and output it first
+                yield from rename_rows(rows_to_rename, *current_renaming)
                 rows_to_rename = []
                 renamed_objects.add(current_object)
-                current_object = "none"
-            # now we can print the new row
-            print(row, file=outfile)
+                current_object = ""
+            # now we can output the new row
+            yield row
 
     if rows_to_rename:
-        for row_to_print in rename_rows(rows_to_rename, *renaming_map[row.object]):
-            print(row_to_print, file=outfile)
+        yield from rename_rows(rows_to_rename, *current_renaming)
         renamed_objects.add(current_object)
 
+
+def run(
+    renaming_map: Mapping[str, tuple[str, str]],
+    outfile: TextIO,
+    agp_rows: Iterable[str | AgpRow],
+):
+    """Run the rename module
+
+    Args:
+        renaming_map:
+            maps the name of a contig to be renamed to a tuple
+            containing the new name and orientation
+        outfile: file where agp output should be sent
+        agp_rows: all input AGP rows
+    """
+    renamed_objects: set[str] = set()
+    agp.write(rename_scaffolds(renaming_map, agp_rows, renamed_objects), outfile)
+
     remaining_objects = renaming_map.keys() - renamed_objects
     if remaining_objects:
         raise ScaffoldNotFoundError(remaining_objects)
@@ -1,50 +1,92 @@
 """
 Functions for cleaning up an AGP to conform to NCBI rules.
 """
-from typing import IO, Iterator, List, Sequence
+
+from typing import IO, Iterable, Iterator, List, Optional, Union
 
 from pyfaidx import Fasta
 
+import agp
 from agp import AgpRow
 from agp.fasta import print_fasta
 
 
-def divide_into_scaffolds(agp_in: Sequence[AgpRow]) -> Iterator[List[AgpRow]]:
+def sanitize_rows(
+    agp_in: Iterable[Union[str, AgpRow]], contigs_in: Fasta, contigs_out: IO
+) -> Iterator[Union[str, AgpRow]]:
     """
-    Take an iterator over the rows of an AGP and turn it into an
-    iterator of the scaffolds of an AGP, where each item is a list of
-    rows with the same object ID.
+    Give each non-gap row of an AGP its own new contig, containing
+    exactly the range of that row, and write these contigs to
+    contigs_out. Rows are grouped into scaffolds on the fly, so only the
+    first row of the current scaffold is ever held in memory.
+
+    Args:
+        agp_in: rows and comment lines of the input AGP
+        contigs_in: the contigs referred to by agp_in
+        contigs_out: file to write the new contigs to
+
+    Yields:
+        the rows of agp_in, adjusted to refer to the new contigs, and
+        its comment lines, unchanged and in their original places
     """
+    contig_counter = 1
     current_scaffold = None
-    current_scaffold_rows: List[AgpRow] = []
+    # the first row of the current scaffold, held back until we know
+    # whether it is the only row in the scaffold
+    first_row: Optional[AgpRow] = None
+    # comments that come after first_row, held back along with it
+    held_comments: List[str] = []
     for row in agp_in:
+        if isinstance(row, str):
+            if first_row is None:
+                yield row
+            else:
+                held_comments.append(row)
+            continue
+
+        if not row.is_gap:
+            # make a new contig containing exactly the range of this
+            # row, and adjust the AGP accordingly
+            # get_seq() takes the 1-based, inclusive AGP coordinates
+            # as they are, and skips building a FastaRecord slice
+            component_part_sequence = contigs_in.get_seq(
+                row.component_id, row.component_beg, row.component_end
+            ).seq
+            new_contig_name = f"contig_{contig_counter}"
+            print_fasta(new_contig_name, component_part_sequence, contigs_out)
+            contig_counter += 1
+            row.component_id = new_contig_name
+            row.component_beg = 1
+            row.component_end = len(component_part_sequence)
+
         if row.object != current_scaffold:
-            if current_scaffold_rows:
-                yield current_scaffold_rows
+            # NCBI does not like single-component scaffolds with "-"
+            # orientation, so force this not to be the case
+            if first_row is not None:
+                first_row.orientation = "+"
+                yield first_row
+                yield from held_comments
+                held_comments.clear()
             current_scaffold = row.object
-            current_scaffold_rows = []
-        current_scaffold_rows.append(row)
-    yield current_scaffold_rows
+            first_row = row
+        else:
+            if first_row is not None:
+                yield first_row
+                yield from held_comments
+                held_comments.clear()
+                first_row = None
+            yield row
 
+    if first_row is not None:
+        first_row.orientation = "+"
+        yield first_row
+        yield from held_comments
 
-def run(agp_in: Sequence[AgpRow], agp_out: IO, contigs_in: Fasta, contigs_out: IO):
-    contig_counter = 1
-    for scaffold_rows in divide_into_scaffolds(agp_in):
-        # NCBI does not like single-component scaffolds with "-"
-        # orientation, so force this not to be the case
-        if len(scaffold_rows) == 1:
-            scaffold_rows[0].orientation = "+"
-        for row in scaffold_rows:
-            if not row.is_gap:
-                # make a new contig containing exactly the range of this
-                # row, and adjust the AGP accordingly
-                component_part_sequence = contigs_in[row.component_id][
-                    row.component_beg - 1 : row.component_end
-                ].seq
-                new_contig_name = f"contig_{contig_counter}"
-                print_fasta(new_contig_name, component_part_sequence, contigs_out)
-                contig_counter += 1
-                row.component_id = new_contig_name
-                row.component_beg = 1
-                row.component_end = len(component_part_sequence)
-            print(row, file=agp_out)
+
+def run(
+    agp_in: Iterable[Union[str, AgpRow]],
+    agp_out: IO,
+    contigs_in: Fasta,
+    contigs_out: IO,
+):
+    agp.write(sanitize_rows(agp_in, contigs_in, contigs_out), agp_out)
@@ -2,11 +2,11 @@
 Functions for splitting a scaffold into subscaffolds at gaps.
 """
 
-import re
-from copy import deepcopy
-from typing import Dict, Iterable, Iterator, List, TextIO, Union
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Union
 
-from . import AgpRow
+import agp
+from agp import AgpRow
 
 
 class ParsingError(Exception):
@@ -15,9 +15,6 @@ class ParsingError(Exception):
     pass
 
 
-empty_line_regex = re.compile(r"^\s*$")
-
-
 def breakpoints_type(filename: str) -> Dict[str, List[int]]:
     """
     Argparse type function for breakpoints file: first column is the
@@ -38,17 +35,19 @@ def breakpoints_type(filename: str) -> Dict[str, List[int]]:
     """
     breakpoints = {}
     with open(filename) as breakpoints_file:
-        for i, line in enumerate(breakpoints_file):
-            if not empty_line_regex.match(line):
-                splits = line.strip().split("\t")
-                try:
-                    if splits[0] in breakpoints:
-                        raise ParsingError(
-                            f"{splits[0]} specified multiple times in breakpoints file"
-                        )
-                    breakpoints[splits[0]] = list(map(int, splits[1].split(",")))
-                except (ValueError, IndexError):
-                    raise ParsingError(f"Cannot parse line {i} of breakpoints: {line}")
+        lines = breakpoints_file.read().splitlines()
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if line:
+            splits = line.split("\t")
+            try:
+                if splits[0] in breakpoints:
+                    raise ParsingError(
+                        f"{splits[0]} specified multiple times in breakpoints file"
+                    )
+                breakpoints[splits[0]] = list(map(int, splits[1].split(",")))
+            except (ValueError, IndexError):
+                raise ParsingError(f"Cannot parse line {i} of breakpoints: {line}")
     return breakpoints
 
 
@@ -90,7 +89,7 @@ def split_contig(contig_row: AgpRow, breakpoints: List[int]) -> List[AgpRow]:
 
     Args:
         contig_row: a single row to be split
-        breakpoints: positions where contig should be split,
+        breakpoints: sorted positions where contig should be split,
             in object coordinates, *not* component coordinates. The left
             part of the split includes the breakpoint: e.g., splitting a
             contig of length 100 at 43 will make two new contigs: one
@@ -112,10 +111,12 @@ def split_contig(contig_row: AgpRow, breakpoints: List[int]) -> List[AgpRow]:
          ['scaf', '751', '867', '6', 'W', 'ctg', '251', '367', '+'],
          ['scaf', '868', '1000', '7', 'W', 'ctg', '368', '500', '+']]
     """
-    rows = [contig_row]
-    for this_breakpoint in sorted(breakpoints):
-        left_part = deepcopy(rows.pop())
-        right_part = deepcopy(left_part)
+    rows: List[AgpRow] = []
+    # the part of the contig still to be split by the remaining breakpoints
+    current_part = contig_row
+    for this_breakpoint in breakpoints:
+        left_part = current_part.copy()
+        right_part = current_part.copy()
 
         left_part.object_end = this_breakpoint
         right_part.object_beg = this_breakpoint + 1
@@ -132,7 +133,9 @@ def split_contig(contig_row: AgpRow, breakpoints: List[int]) -> List[AgpRow]:
             )
             right_part.component_end = left_part.component_beg - 1
 
-        rows += [left_part, right_part]
+        rows.append(left_part)
+        current_part = right_part
+    rows.append(current_part)
     return rows
 
 
@@ -177,8 +180,15 @@ def split_scaffold(
     out_rows = []
     rows_this_subscaffold: List[AgpRow] = []
     subscaffold_counter = 1
+    # sort the breakpoints so that the ones within each row can be found
+    # by bisection, instead of checking every breakpoint against every row
+    breakpoints = sorted(breakpoints)
     for row in scaffold_rows:
-        if any(map(row.contains, breakpoints)):
+        # the breakpoints within this row
+        first = bisect_left(breakpoints, row.object_beg)
+        last = bisect_right(breakpoints, row.object_end)
+        row_breakpoints = breakpoints[first:last]
+        if row_breakpoints:
             # if the breakpoint is within a gap, our job is simple:
             # just forget about the gap row, output the previous
             # subscaffold, and start a new subscaffold
@@ -191,7 +201,7 @@ def split_scaffold(
             # break a contig into pieces
             else:
                 # split the contig into two or more rows
-                contig_rows = split_contig(row, list(filter(row.contains, breakpoints)))
+                contig_rows = split_contig(row, row_breakpoints)
 
                 # the first row goes at the end of the current scaffold
                 rows_this_subscaffold.append(contig_rows[0])
@@ -217,35 +227,52 @@ def split_scaffold(
     return out_rows
 
 
-def run(
-    breakpoints: Dict[str, List[int]],
-    outfile: TextIO,
-    agp_infile: Iterator[Union[str, AgpRow]],
-):
+def split_scaffolds(
+    breakpoints: Dict[str, List[int]], agp_rows: Iterable[Union[str, AgpRow]]
+) -> Iterator[Union[str, AgpRow]]:
+    """
+    Splits the scaffolds of an AGP that have breakpoints, passing the
+    other scaffolds and comments through unchanged.
+
+    Args:
+        breakpoints: a dict mapping scaffold name to a list of
+            breakpoints on that scaffold
+        agp_rows: all rows of the input AGP
+
+    Returns:
+        an iterator over the rows of the output AGP
+    """
     rows_this_scaffold: List[AgpRow] = []  # list of all agp rows in current scaffold
-    for row in agp_infile:
-        if isinstance(row, str):  # print out comment rows as-is
-            print(row, file=outfile)
+    # the name of the current scaffold, and its breakpoints if it has any
+    current_object = ""
+    current_breakpoints: Optional[List[int]] = None
+    for row in agp_rows:
+        if isinstance(row, str):  # pass comment rows through as-is
+            yield row
             continue
 
         # if we're on a new scaffold, do any necessary modification to
-        # the previous scaffold, print it out, and clear the buffer
-        if rows_this_scaffold and rows_this_scaffold[0].object != row.object:
-            if rows_this_scaffold[0].object in breakpoints:
+        # the previous scaffold, output it, and clear the buffer
+        if row.object != current_object:
+            if current_breakpoints is not None:
                 rows_this_scaffold = split_scaffold(
-                    rows_this_scaffold,
-                    breakpoints[rows_this_scaffold[0].object],
+                    rows_this_scaffold, current_breakpoints
                 )
-            for r in rows_this_scaffold:
-                print(r, file=outfile)
+            yield from rows_this_scaffold
             rows_this_scaffold = []
+            current_object = row.object
+            current_breakpoints = breakpoints.get(current_object)
 
         rows_this_scaffold.append(row)
 
-    if rows_this_scaffold[0].object in breakpoints:
-        rows_this_scaffold = split_scaffold(
-            rows_this_scaffold,
-            breakpoints[rows_this_scaffold[0].object],
-        )
-    for r in rows_this_scaffold:
-        print(r, file=outfile)
+    if current_breakpoints is not None:
+        rows_this_scaffold = split_scaffold(rows_this_scaffold, current_breakpoints)
+    yield from rows_this_scaffold
+
+
+def run(
+    breakpoints: Dict[str, List[int]],
+    outfile: TextIO,
+    agp_infile: Iterator[Union[str, AgpRow]],
+):
+    agp.write(split_scaffolds(breakpoints, agp_infile), outfile)
@@ -2,12 +2,15 @@
 Functions for transforming genomic coordinates from contig-based to
 scaffold-based.
 """
+
 from __future__ import annotations
 
+from bisect import bisect_right
 from collections import defaultdict
-from typing import Dict, Iterator, List, TextIO, Union
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, TextIO, Union
 
-from agp import AgpRow
+from agp import AgpRow, bed
 from agp.bed import BedRange
 
 
@@ -37,24 +40,57 @@ class BadOrientationError(Exception):
     pass
 
 
-ContigDict = Dict[str, List[AgpRow]]
+@dataclass
+class ContigRows:
+    """The rows of an AGP in which a single contig is the component_id"""
+
+    rows: List[AgpRow]
+    """the rows, in the order they appear in the AGP"""
+    sorted_indices: List[int]
+    """indices into rows, sorted by component_beg and then by AGP order"""
+    component_begs: List[int]
+    """component_beg of each row, in sorted_indices order"""
+    max_component_ends: List[int]
+    """largest component_end of each row and all rows before it, in
+    sorted_indices order"""
+
+
+ContigDict = Dict[str, ContigRows]
 
 
 def create_contig_dict(agp_in: Iterator[Union[str, AgpRow]]) -> ContigDict:
     """
-    Load the agp file into a dictionary mapping contig name to a list
-    of rows in which that contig is the component_id.
+    Load the agp file into a dictionary mapping contig name to the rows
+    in which that contig is the component_id, indexed so that the rows
+    containing a position can be found by bisection.
 
     Args:
         agp_in: an agp file to read into a dictionary
 
     Returns:
-        a dict mapping contig name to a list of rows in which that
-        contig is the component_id
+        a dict mapping contig name to a ContigRows containing the rows
+        in which that contig is the component_id
     """
-    contig_dict: ContigDict = defaultdict(list)
+    contig_rows: Dict[str, List[AgpRow]] = defaultdict(list)
     for row in (r for r in agp_in if isinstance(r, AgpRow) and not r.is_gap):
-        contig_dict[row.component_id].append(row)
+        contig_rows[row.component_id].append(row)
+
+    contig_dict: ContigDict = {}
+    for contig_name, rows in contig_rows.items():
+        # the sort is stable, so rows with the same component_beg stay
+        # in AGP order
+        sorted_indices = sorted(range(len(rows)), key=lambda i: rows[i].component_beg)
+        max_component_ends: List[int] = []
+        max_component_end = 0
+        for i in sorted_indices:
+            max_component_end = max(max_component_end, rows[i].component_end)
+            max_component_ends.append(max_component_end)
+        contig_dict[contig_name] = ContigRows(
+            rows,
+            sorted_indices,
+            [rows[i].component_beg for i in sorted_indices],
+            max_component_ends,
+        )
     return contig_dict
 
 
@@ -96,9 +132,11 @@ def find_agp_row(
 ) -> AgpRow:
     """Find the agp row containing a coordinate.
 
-    Given a dictionary mapping contig name to a list of agp rows
-    containing that contig, and a single position in contig coordinates,
-    find and return the AGP row containing that position.
+    Given a dictionary mapping contig name to the agp rows containing
+    that contig, and a single position in contig coordinates, find and
+    return the AGP row containing that position. If several rows
+    contain the position, e.g. because the contig is used in more than
+    one scaffold, return the one that comes first in the AGP.
 
     Args:
         contig_name:
@@ -106,23 +144,35 @@ def find_agp_row(
         coordinate_on_contig:
             the position to look for, in contig coordinates
         contig_dict:
-            a dictionary mapping contig name to a list of agp rows
-            containing that contig
+            a dictionary mapping contig name to the agp rows containing
+            that contig, as made by create_contig_dict()
 
     Returns:
         a single AGP row containing the requested position
     """
-    contig_list = contig_dict[contig_name]
-    if not contig_list:
-        raise NoSuchContigError(contig_name)
-    for agp_row in contig_list:
-        if (
-            agp_row.component_beg <= coordinate_on_contig
-            and agp_row.component_end >= coordinate_on_contig
+    try:
+        contig_rows = contig_dict[contig_name]
+    except KeyError:
+        raise NoSuchContigError(contig_name) from None
+
+    # look back through the rows starting at or before the coordinate,
+    # stopping as soon as none of the remaining rows reach it. When rows
+    # don't overlap, only the last of them is ever checked.
+    found_index: Optional[int] = None
+    for j in range(
+        bisect_right(contig_rows.component_begs, coordinate_on_contig) - 1, -1, -1
+    ):
+        if contig_rows.max_component_ends[j] < coordinate_on_contig:
+            break
+        i = contig_rows.sorted_indices[j]
+        if contig_rows.rows[i].component_end >= coordinate_on_contig and (
+            found_index is None or i < found_index
         ):
-            return agp_row
+            found_index = i
 
-    raise CoordinateNotFoundError(f"{contig_name}:{coordinate_on_contig}")
+    if found_index is None:
+        raise CoordinateNotFoundError(f"{contig_name}:{coordinate_on_contig}")
+    return contig_rows.rows[found_index]
 
 
 def transform_bed_row(bed_row: BedRange, contig_dict: ContigDict) -> BedRange:
@@ -182,5 +232,4 @@ def run(
     bed_in: Iterator[BedRange], agp_in: Iterator[Union[str, AgpRow]], bed_out: TextIO
 ):
     contig_dict = create_contig_dict(agp_in)
-    for bed_row in bed_in:
-        print(transform_bed_row(bed_row, contig_dict), file=bed_out)
+    bed.write((transform_bed_row(r, contig_dict) for r in bed_in), bed_out)
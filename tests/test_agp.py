@@ -1,4 +1,5 @@
 import os.path
+from io import StringIO
 
 import pytest
 
@@ -71,6 +72,24 @@ def test_contig_row_to_str():
     assert str(agp.AgpRow(contig_row_string)) == contig_row_string
 
 
+@pytest.mark.parametrize("row_string", [gap_row_string, contig_row_string])
+def test_repr(row_string):
+    """Test that the repr of a row evaluates back to an equal row"""
+    row = agp.AgpRow(row_string)
+    assert eval(repr(row), {"AgpRow": agp.AgpRow}) == row
+
+
+@pytest.mark.parametrize("row_string", [gap_row_string, contig_row_string])
+def test_copy(row_string):
+    """Test that a copied row is equal to, but independent of, the original"""
+    row = agp.AgpRow(row_string)
+    row_copy = row.copy()
+    assert row_copy == row
+    row_copy.object_beg += 1
+    assert row_copy != row
+    assert str(row) == row_string
+
+
 def test_contains():
     """Test that AgpRow.contains() works as expected"""
     row = agp.AgpRow(contig_row_string)
@@ -94,3 +113,29 @@ def test_read():
             assert agp.is_string(row)
         else:
             assert isinstance(row, agp.AgpRow)
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 8192])
+def test_write(batch_size):
+    """Test that rows and comments are written back out line by line"""
+    rows = [
+        "# a comment",
+        agp.AgpRow(contig_row_string),
+        agp.AgpRow(gap_row_string),
+    ]
+    outfile = StringIO()
+    agp.write(rows, outfile, batch_size=batch_size)
+    assert outfile.getvalue() == "\n".join(
+        ["# a comment", contig_row_string, gap_row_string, ""]
+    )
+
+
+def test_write_before_error():
+    """Test that rows before a bad line are still written out"""
+    outfile = StringIO()
+    with pytest.raises(agp.AgpFormatError):
+        agp.write(
+            agp.read(StringIO(f"{contig_row_string}\n{gap_row_string}\nbad line\n")),
+            outfile,
+        )
+    assert outfile.getvalue() == f"{contig_row_string}\n{gap_row_string}\n"
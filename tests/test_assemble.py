@@ -1,22 +1,41 @@
+import gzip
 from os import devnull
 from os.path import dirname, join
+from shutil import copyfile
 from unittest.mock import patch
 
+import pyfaidx
 import pytest
 import screed
 
 from agp import AgpRow
 from agp.agptools import main
-from agp.assemble import EmptyAgpError, NoSuchContigError, reverse_complement, run
+from agp.assemble import (
+    EmptyAgpError,
+    NoSuchContigError,
+    complement,
+    open_contigs,
+    reverse_complement,
+    run,
+)
 
 
-def test_assemble(tmpdir):
+@pytest.fixture
+def contigs_fasta(tmp_path):
+    """a copy of broken_contigs.fa, so that its index isn't written to tests/data"""
+    return copyfile(
+        join(dirname(__file__), "data", "broken_contigs.fa"),
+        tmp_path / "broken_contigs.fa",
+    )
+
+
+def test_assemble(tmpdir, contigs_fasta):
     with patch(
         "sys.argv",
         [
             "agptools",
             "assemble",
-            join(dirname(__file__), "data", "broken_contigs.fa"),
+            str(contigs_fasta),
             join(dirname(__file__), "data", "test.agp"),
             "-o",
             join(tmpdir, "assemble_out.fa"),
@@ -41,13 +60,13 @@ def test_assemble_help(capsys):
     assert "AGP file assembling contigs into scaffolds" in out
 
 
-def test_assemble_empty_agp():
+def test_assemble_empty_agp(contigs_fasta):
     with patch(
         "sys.argv",
         [
             "agptools",
             "assemble",
-            join(dirname(__file__), "data", "broken_contigs.fa"),
+            str(contigs_fasta),
             join(dirname(__file__), "data", "empty.agp"),
         ],
     ):
@@ -55,19 +74,92 @@ def test_assemble_empty_agp():
             main()
 
 
+@pytest.mark.parametrize(
+    "base,complement_base", [("A", "T"), ("c", "g"), ("G", "C"), ("t", "a"), ("N", "N")]
+)
+def test_complement(base, complement_base):
+    assert complement(base) == complement_base
+
+
 def test_reverse_complement():
     assert reverse_complement("ACTGcgTtCAGaaTTx") == "xAAttCTGaAcgCAGT"
 
 
-def test_no_such_contig():
+def test_no_such_contig(contigs_fasta):
     agp_rows = [
         AgpRow("scaffold_18\t1930402\t2636956\t9\tW\ttig123\t1\t706555\t+"),
     ]
     with pytest.raises(NoSuchContigError) as err:
-        with screed.open(
-            join(dirname(__file__), "data", "broken_contigs.fa")
-        ) as contigs_fasta:
-            with open(devnull, "w") as outfile:
-                run(contigs_fasta, outfile, agp_rows)
+        with open_contigs(str(contigs_fasta)) as contigs, open(devnull, "w") as outfile:
+            run(contigs, outfile, agp_rows)
 
     assert "tig123" in str(err.value)
+
+
+def test_open_contigs_variable_line_length(tmpdir):
+    contigs_path = tmpdir / "variable.fa"
+    contigs_path.write(">tig1\nACGTAC\nACG\nACGTAC\n>tig2\nGGCC\n")
+    with open_contigs(str(contigs_path)) as contigs:
+        assert contigs["tig1"][4:10] == "ACACGA"
+        assert contigs["tig2"][:] == "GGCC"
+
+
+def test_open_contigs_closes_fasta(contigs_fasta):
+    with open_contigs(str(contigs_fasta)) as contigs:
+        assert not contigs.faidx.file.closed
+    assert contigs.faidx.file.closed
+
+
+def test_open_contigs_gzip(tmp_path):
+    contigs_path = tmp_path / "contigs.fa.gz"
+    with gzip.open(contigs_path, "wt") as contigs_file:
+        contigs_file.write(">tig1\nACGTAC\nACGTAC\n>tig2\nGGCC\n")
+    with open_contigs(str(contigs_path)) as contigs:
+        assert contigs["tig1"][4:10] == "ACACGT"
+        assert contigs["tig2"][:] == "GGCC"
+
+
+@pytest.mark.parametrize(
+    "contigs_text",
+    [
+        # indexed by pyfaidx
+        ">tig1 some description\nACGTAC\nACGTAC\n>tig2\tmore\nGGCC\n",
+        # variable line lengths, so loaded with screed
+        ">tig1 some description\nACGTAC\nACG\nTAC\n>tig2\tmore\nGGCC\n",
+    ],
+)
+def test_open_contigs_header_description(tmp_path, contigs_text):
+    contigs_path = tmp_path / "contigs.fa"
+    contigs_path.write_text(contigs_text)
+    with open_contigs(str(contigs_path)) as contigs:
+        assert contigs["tig1"][4:10] == "ACACGT"
+        assert contigs["tig2"][:] == "GGCC"
+
+
+def test_open_contigs_unwritable_index(tmp_path, monkeypatch):
+    def build_index(self):
+        raise OSError(f"{self.indexname} may not be writable.")
+
+    monkeypatch.setattr(pyfaidx.Faidx, "build_index", build_index)
+    contigs_path = tmp_path / "contigs.fa"
+    contigs_path.write_text(">tig1\nACGTAC\nACGTAC\n>tig2\nGGCC\n")
+    with open_contigs(str(contigs_path)) as contigs:
+        assert contigs["tig1"][4:10] == "ACACGT"
+        assert contigs["tig2"][:] == "GGCC"
+    assert not (tmp_path / "contigs.fa.fai").exists()
+
+
+@pytest.mark.parametrize(
+    "contigs_text",
+    [
+        # indexed by pyfaidx
+        ">tig1\nAAAA\n>tig2\nGGCC\n>tig1\nCCCC\n",
+        # variable line lengths, so loaded with screed
+        ">tig1\nAAAA\n>tig2\nGG\nCC\nA\n>tig1\nCCCC\n",
+    ],
+)
+def test_open_contigs_duplicate_names(tmp_path, contigs_text):
+    contigs_path = tmp_path / "contigs.fa"
+    contigs_path.write_text(contigs_text)
+    with open_contigs(str(contigs_path)) as contigs:
+        assert contigs["tig1"][:] == "CCCC"
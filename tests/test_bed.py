@@ -2,7 +2,7 @@ from io import StringIO
 
 import pytest
 
-from agp.bed import BedRange, ParsingError, read
+from agp.bed import BedRange, ParsingError, read, write
 
 
 def test_read_bed():
@@ -70,3 +70,29 @@ def test_read_bad_bed_line(bed_line):
 )
 def test_bed_to_string(bed_line, bed_line_str):
     assert str(bed_line) == bed_line_str
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 8192])
+def test_write(batch_size):
+    bed_ranges = [
+        BedRange("scaffold_1", 1, 100, "+"),
+        BedRange("scaffold_2"),
+        BedRange("scaffold_3", 5, 10),
+    ]
+    outfile = StringIO()
+    write(bed_ranges, outfile, batch_size=batch_size)
+    assert (
+        outfile.getvalue() == "scaffold_1\t1\t100\t+\nscaffold_2\nscaffold_3\t5\t10\n"
+    )
+
+
+def test_write_before_error():
+    def bed_ranges():
+        yield BedRange("scaffold_1", 1, 100)
+        yield BedRange("scaffold_2")
+        raise ParsingError("bad range")
+
+    outfile = StringIO()
+    with pytest.raises(ParsingError):
+        write(bed_ranges(), outfile)
+    assert outfile.getvalue() == "scaffold_1\t1\t100\nscaffold_2\n"
@@ -74,3 +74,10 @@ def test_bad_flip(sample_agp_rows, flip_bed_range, bed_error, error_string):
     with pytest.raises(bed_error) as exc:
         flip(sample_agp_rows, [flip_bed_range])
     assert error_string in str(exc.value)
+
+
+def test_flip_range_from_zero(sample_agp_rows):
+    flipped_rows = flip(sample_agp_rows, [BedRange("scaffold_18", 0, 2637000)])
+    assert flipped_rows[0].component_id == "tig123"
+    assert flipped_rows[0].orientation == "+"
+    assert flipped_rows[2].orientation == "+"
@@ -3,13 +3,14 @@ from unittest.mock import patch
 
 import pytest
 
-from agp import open_agp
+from agp import AgpRow, open_agp
 from agp.agptools import main
 from agp.join import (
     BadSequenceNameError,
     JoinGroup,
     ScaffoldNotFoundError,
     ScaffoldUsedTwiceError,
+    join_scaffolds,
     joins_type,
     make_superscaffold_name,
     run,
@@ -43,6 +44,16 @@ def test_parse_named_joins(tmp_path):
     ]
 
 
+def test_oriented_scaffolds_follow_scaffolds():
+    join_group = JoinGroup(["scaffold_1", "-scaffold_2"])
+    join_group.scaffolds.append("+scaffold_3")
+    assert join_group.oriented_scaffolds == [
+        ("scaffold_1", False),
+        ("scaffold_2", True),
+        ("scaffold_3", False),
+    ]
+
+
 @pytest.mark.parametrize(
     "joins_txt",
     [
@@ -74,6 +85,8 @@ def test_bad_sequence_name_error(tmp_path):
         (["scaffold_3", "scaffold_4", "scaffold_5"], "scaffold_3p4p5"),
         (["contig2", "scaffold_4", "chr1"], "contig2pscaffold_4pchr1"),
         (["scaffold_1", "contig_2", "scaffold_3"], "scaffold_1pcontig_2pscaffold_3"),
+        (["HiC_scaffold_1", "HiC_scaffold_2"], "HiC_scaffold_1p2"),
+        (iter(["contig2", "chr1"]), "contig2pchr1"),
     ],
 )
 def test_make_superscaffold_name(old_names, new_name):
@@ -114,6 +127,20 @@ def test_run_join(join_txt, correct_agp_filename, tmp_path):
             assert line1 == line2
 
 
+def test_join_scaffolds_from_iterator():
+    superscaffold_rows = iter(
+        [
+            [AgpRow("scaffold_1\t1\t100\t1\tW\tctg_1\t1\t100\t+")],
+            [AgpRow("scaffold_2\t1\t50\t1\tW\tctg_2\t1\t50\t+")],
+        ]
+    )
+    assert [str(row) for row in join_scaffolds(superscaffold_rows, 10)] == [
+        "scaffold_1p2\t1\t100\t1\tW\tctg_1\t1\t100\t+",
+        "scaffold_1p2\t101\t110\t2\tN\t10\tscaffold\tyes\tna",
+        "scaffold_1p2\t111\t160\t3\tW\tctg_2\t1\t50\t+",
+    ]
+
+
 def test_scaffold_not_found(tmp_path):
     with open(tmp_path / "joins.txt", "w") as joins_file:
         print("scaffold_10,scaffold_17", file=joins_file)
@@ -36,6 +36,27 @@ def test_remove(tmpdir):
             assert row.object not in ["scaffold_18", "scaffold_20"]
 
 
+def test_remove_from_stdin(tmpdir):
+    with open(join(dirname(__file__), "data", "test.agp")) as agp_file:
+        with patch("sys.stdin", agp_file), patch(
+            "sys.argv",
+            [
+                "agptools",
+                "remove",
+                join(dirname(__file__), "data", "scaffolds_to_remove.txt"),
+                "-o",
+                join(tmpdir, "remove_out.agp"),
+            ],
+        ):
+            main()
+
+    out_rows = list(open_agp(join(tmpdir, "remove_out.agp")))
+    assert len(out_rows) > 1
+    for row in out_rows:
+        if not is_string(row):
+            assert row.object not in ["scaffold_16", "scaffold_18"]
+
+
 def test_run_remove(tmp_path):
     agp_rows = [
         AgpRow("scaffold_18\t1930402\t2636956\t9\tW\ttig123\t1\t706555\t+"),
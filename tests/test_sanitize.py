@@ -1,11 +1,15 @@
+from io import StringIO
 from os.path import dirname, join
+from shutil import copyfile
 from unittest.mock import patch
 
 import pytest
 import screed
+from pyfaidx import Fasta
 
 from agp import open_agp
 from agp.agptools import main
+from agp.sanitize import sanitize_rows
 
 
 def test_sanitize_help(capsys):
@@ -17,13 +21,22 @@ def test_sanitize_help(capsys):
     assert "path where sanitized contigs" in out
 
 
-def test_sanitize_main(tmpdir):
+@pytest.fixture
+def contigs_fasta(tmp_path):
+    """a copy of test_sanitize.fa, so that its index isn't written to tests/data"""
+    return copyfile(
+        join(dirname(__file__), "data", "test_sanitize.fa"),
+        tmp_path / "test_sanitize.fa",
+    )
+
+
+def test_sanitize_main(tmpdir, contigs_fasta):
     with patch(
         "sys.argv",
         [
             "agptools",
             "sanitize",
-            join(dirname(__file__), "data", "test_sanitize.fa"),
+            str(contigs_fasta),
             join(tmpdir, "test_out.fa"),
             join(dirname(__file__), "data", "test_sanitize.agp"),
             "-o",
@@ -44,3 +57,42 @@ def test_sanitize_main(tmpdir):
         ) as correct_out_fasta:
             for test_seq, correct_seq in zip(test_out_fasta, correct_out_fasta):
                 assert test_seq == correct_seq
+
+
+def test_sanitize_rows_last_scaffold_kept_in_order(contigs_fasta):
+    # the last scaffold has more than one row, so the reverse orientation
+    # of its first row must be kept
+    agp_in = list(open_agp(join(dirname(__file__), "data", "test_sanitize.agp")))
+    contigs_in = Fasta(str(contigs_fasta))
+    contigs_out = StringIO()
+
+    rows = list(sanitize_rows(agp_in[5:8], contigs_in, contigs_out))
+
+    assert [row.object_beg for row in rows] == [1, 51, 101]
+    assert rows[0].component_id == "contig_1"
+    assert rows[0].orientation == "-"
+    assert rows[2].component_id == "contig_2"
+    assert contigs_out.getvalue().count(">") == 2
+
+
+def test_sanitize_rows_keeps_comments(contigs_fasta):
+    agp_rows = list(open_agp(join(dirname(__file__), "data", "test_sanitize.agp")))
+    # scaffold_2 has three rows; scaffold_3 and scaffold_5 have one each
+    agp_in = ["# header"] + agp_rows[5:7] + ["# a"] + agp_rows[7:9] + ["# b"]
+    agp_in += agp_rows[12:13] + ["# c"]
+    contigs_in = Fasta(str(contigs_fasta))
+
+    out = list(sanitize_rows(agp_in, contigs_in, StringIO()))
+
+    assert [row if isinstance(row, str) else row.object for row in out] == [
+        "# header",
+        "scaffold_2",
+        "scaffold_2",
+        "# a",
+        "scaffold_2",
+        "scaffold_3",
+        "# b",
+        "scaffold_5",
+        "# c",
+    ]
+    assert out[5].orientation == "+"
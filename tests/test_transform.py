@@ -1,9 +1,10 @@
+from io import StringIO
 from os.path import dirname, join
 from unittest.mock import patch
 
 import pytest
 
-from agp import AgpRow, open_agp
+from agp import AgpRow, open_agp, read
 from agp.agptools import main
 from agp.bed import BedRange, open_bed
 from agp.transform import (
@@ -38,10 +39,32 @@ def test_bad_orientation_error():
     assert "+/-:" in str(err.value)
 
 
-def test_coordinate_not_found_error(contig_dict):
+@pytest.mark.parametrize("coordinate", [876238, 0])
+def test_coordinate_not_found_error(contig_dict, coordinate):
     with pytest.raises(CoordinateNotFoundError) as err:
-        find_agp_row("tig00001012|arrow|arrow", 876238, contig_dict)
-    assert "tig00001012|arrow|arrow:876238" in str(err.value)
+        find_agp_row("tig00001012|arrow|arrow", coordinate, contig_dict)
+    assert f"tig00001012|arrow|arrow:{coordinate}" in str(err.value)
+
+
+# rows of an AGP using the same contig in two scaffolds, with overlapping
+# component ranges
+whole_contig_row = "S1\t1\t1000\t1\tW\tctgA\t1\t1000\t+"
+part_contig_row = "S2\t1\t101\t1\tW\tctgA\t100\t200\t+"
+
+
+@pytest.mark.parametrize(
+    "agp_rows, coordinate, scaffold",
+    [
+        ([whole_contig_row, part_contig_row], 500, "S1"),
+        ([whole_contig_row, part_contig_row], 150, "S1"),
+        ([part_contig_row, whole_contig_row], 150, "S2"),
+        ([part_contig_row, whole_contig_row], 50, "S1"),
+    ],
+)
+def test_find_agp_row_contig_in_two_scaffolds(agp_rows, coordinate, scaffold):
+    """The first row in the AGP containing the coordinate is found"""
+    contig_dict = create_contig_dict(read(StringIO("\n".join(agp_rows))))
+    assert find_agp_row("ctgA", coordinate, contig_dict).object == scaffold
 
 
 def test_unsupported_operation_error_coordinateless(contig_dict):